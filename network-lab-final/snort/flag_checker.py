@@ -1,9 +1,11 @@
-import os
+from pathlib import Path
+
+ATTACK_INFO = Path("/shared/attack_info.txt")
+STOP_ATTACK = Path("/shared/stop_attack.txt")
 
 # === Read correct flag data ===
 try:
-    with open("/shared/attack_info.txt", "r") as f:
-        payload, port, attack_type, ip_last_octet = f.read().strip().split(",")
+    payload, port, attack_type, ip_last_octet = ATTACK_INFO.read_text().strip().split(",")
 except FileNotFoundError:
     print("❌ Error: Cannot find attack info.")
     exit()
@@ -17,14 +19,11 @@ user_flag = input("\nEnter your FLAG: ").strip()
 # === Compare and act ===
 if user_flag == expected_flag:
     print("\n✅ Correct! Attack stopped successfully.\n")
-    with open("/shared/stop_attack.txt", "w") as f:
-        f.write("stop\n")
+    STOP_ATTACK.write_text("stop\n")
 else:
     print("\n❌ Wrong flag! Increasing delay...\n")
     try:
-        with open("/shared/stop_attack.txt", "r") as f:
-            current = int(f.read().strip())
+        current = int(STOP_ATTACK.read_text().strip())
     except:
         current = 0
-    with open("/shared/stop_attack.txt", "w") as f:
-        f.write(str(current + 5))
+    STOP_ATTACK.write_text(str(current + 5))
@@ -4,66 +4,142 @@ import random
 import time
 import os
 import argparse
+import hashlib
+import re
 import yaml
-from rich.progress import Progress
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
 
 SHARED_VOLUME = "./network-lab-final/shared"
+MOTD_FILE = "./network-lab-final/snort/motd"
 COMPOSE_FILE = "./network-lab-final/docker-compose.yml"
+COMPOSE_STAMP = "./network-lab-final/.compose.sha256"
+LAB_SERVICES = {"attacker", "snort"}
 ATTACKER_COMPOSE_KEY = "attacker"
 TARGET_IP = "172.20.0.10"
 
 def get_attacker_ip():
-    last_octet = random.randint(2, 254)
-    return f"172.20.0.{last_octet}"
+    # Never hand the attacker the Snort container's address
+    ip = TARGET_IP
+    while ip == TARGET_IP:
+        ip = f"172.20.0.{random.randint(2, 254)}"
+    return ip
 
-def update_compose_ip(ip):
+def read_compose_ip():
     with open(COMPOSE_FILE, "r") as f:
-        data = yaml.safe_load(f)
+        data = yaml.load(f, Loader=SafeLoader)
 
-    data['services'][ATTACKER_COMPOSE_KEY]['networks']['labnet']['ipv4_address'] = ip
+    return data['services'][ATTACKER_COMPOSE_KEY]['networks']['labnet']['ipv4_address']
 
-    with open(COMPOSE_FILE, "w") as f:
-        yaml.dump(data, f)
+def update_compose_ip(ip):
+    # Only the attacker's address changes, so edit that line in place rather
+    # than round-tripping (and reformatting) the whole file through YAML.
+    # The match may not run past the attacker block into the next service.
+    compose = Path(COMPOSE_FILE)
+    text, count = re.subn(
+        rf"(^  {ATTACKER_COMPOSE_KEY}:[ \t]*\n(?:(?!^ {{0,2}}\S).)*?ipv4_address:[ \t]*)\S+",
+        rf"\g<1>{ip}",
+        compose.read_text(),
+        count=1,
+        flags=re.MULTILINE | re.DOTALL
+    )
+    if count != 1:
+        raise ValueError(f"No ipv4_address for service '{ATTACKER_COMPOSE_KEY}' in {COMPOSE_FILE}")
+    compose.write_text(text)
 
 def reset_shared_files():
     Path(f"{SHARED_VOLUME}/stop_attack.txt").write_text("0")
     Path(f"{SHARED_VOLUME}/attack_info.txt").write_text("")
 
-def main(debug=False):
-    attacker_ip = get_attacker_ip()
-    port = random.randint(1025, 65535)
-    payload = random.choice(["eagle", "falcon", "panther", "ghost"])
-    flag = f"{payload}_{attacker_ip.split('.')[-1]}_{port}"
+def read_attack_info():
+    # Written by the running attacker as "payload,port,attack_type,ip_last_octet"
+    try:
+        fields = Path(f"{SHARED_VOLUME}/attack_info.txt").read_text().strip().split(",")
+    except FileNotFoundError:
+        return None
+    return fields if len(fields) == 4 else None
+
+def wait_for_attack_info(timeout=10):
+    # A freshly started attacker needs a moment to write attack_info.txt
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        attack_info = read_attack_info()
+        if attack_info:
+            return attack_info
+        time.sleep(0.5)
+    return read_attack_info()
+
+def compose_digest():
+    return hashlib.sha256(Path(COMPOSE_FILE).read_bytes()).hexdigest()
 
-    update_compose_ip(attacker_ip)
-    reset_shared_files()
+def lab_is_running():
+    result = subprocess.run(
+        ["docker", "compose", "-f", COMPOSE_FILE, "ps", "--status", "running", "--services"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return False
+    return LAB_SERVICES <= set(result.stdout.split())
 
+def can_reuse_lab():
+    # Containers are only reused if they were started from the current compose file
+    stamp = Path(COMPOSE_STAMP)
+    if not stamp.exists() or stamp.read_text().strip() != compose_digest():
+        return False
+    return lab_is_running()
+
+def main(debug=False, recreate=False):
     mode = "DEBUG" if debug else "NORMAL"
-    print(f"[INFO] Starting lab in {mode} mode...")
 
-    steps = [
-        ("Tearing down previous lab environment...", ["docker", "compose", "-f", COMPOSE_FILE, "down"]),
-        ("Building and starting containers...", ["docker", "compose", "-f", COMPOSE_FILE, "up", "--build", "-d"])
-    ]
+    if not recreate and can_reuse_lab():
+        attacker_ip = read_compose_ip()
+        print(f"[INFO] Reusing running lab in {mode} mode...")
+    else:
+        attacker_ip = get_attacker_ip()
+        update_compose_ip(attacker_ip)
+        reset_shared_files()
+
+        print(f"[INFO] Starting lab in {mode} mode...")
 
-    with Progress() as progress:
+        steps = [
+            ("Tearing down previous lab environment...", ["docker", "compose", "-f", COMPOSE_FILE, "down"]),
+            ("Building and starting containers...", ["docker", "compose", "-f", COMPOSE_FILE, "up", "--build", "-d"])
+        ]
+
+        stamp = Path(COMPOSE_STAMP)
+        stamp.unlink(missing_ok=True)
         for desc, cmd in steps:
-            task = progress.add_task(f"[•] {desc}", total=None)
-            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            progress.update(task, advance=1)
-            progress.remove_task(task)
+            print(f"[•] {desc}", flush=True)
+            result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            if result.returncode != 0:
+                print(f"[ERROR] Command failed: {' '.join(cmd)}")
+                return
+
+        stamp.write_text(compose_digest())
 
     if debug:
+        # The attacker picks its own port, so report the one it published
+        attack_info = wait_for_attack_info()
+        port = attack_info[1] if attack_info else "<port>"
         print(f"[INFO] Assigning attacker IP: {attacker_ip}")
         print(f"[FLAG] Expected format: <payload>_{attacker_ip.split('.')[-1]}_{port}")
         print("[DEBUG] To enter Snort shell, run:")
-        print("    docker exec -it snort bash")
+        print("    docker attach snort")
     else:
         print("[✓] Lab started Successfuly dropping shell...\n")
-        subprocess.run(["docker", "exec", "-it", "snort", "bash"])
+        # The banner was printed when the container's shell started, before we attached
+        print(Path(MOTD_FILE).read_text(encoding="utf-8"), flush=True)
+        # Stay the parent process (rather than os.execvp) so a failed attach can be reported
+        result = subprocess.run(["docker", "attach", "snort"])
+        if result.returncode != 0:
+            print("[ERROR] Could not attach to the Snort shell. Run `python3 run.py --recreate` to rebuild the lab.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run Intrusion Detection Lab")
     parser.add_argument("--debug", action="store_true", help="Run in debug mode")
+    parser.add_argument("--recreate", action="store_true", help="Tear down and rebuild the lab containers")
     args = parser.parse_args()
-    main(debug=args.debug)
+    main(debug=args.debug, recreate=args.recreate)